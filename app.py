@@ -1,13 +1,32 @@
-import json
+import re
+import struct
 import time
+import bisect
+import functools
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter
 from pathlib import Path
-from typing import List, Dict
-from datetime import datetime, timedelta
+from typing import List, Dict, FrozenSet, NamedTuple, Optional, Tuple
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 
 import aiohttp
 import asyncio
 import feedparser
+import lxml.html
+import msgpack
+import numpy as np
 import streamlit as st
+from lxml import etree
+
+try:
+    import uvloop
+
+    # Se pasa a asyncio.run en lugar de instalar una política de event loop (obsoleta desde Python 3.14)
+    _LOOP_FACTORY = uvloop.new_event_loop
+except ImportError:
+    _LOOP_FACTORY = None
 
 # Configuración de la página
 st.set_page_config(page_title="Feed de Ciberseguridad", layout="wide", initial_sidebar_state="expanded")
@@ -22,186 +41,384 @@ RSS_FEEDS = {
 }
 
 # Archivo de caché
-CACHE_FILE = Path("cache/news_cache.json")
+CACHE_FILE = Path("cache/news_cache.msgpack")
 CACHE_DURATION = 600  # 10 minutos en segundos
+CACHE_VERSION = 5  # Cambia cuando cambia el formato de las noticias guardadas
+
+# Tiempos límite por feed: conexión rápida, lectura algo más holgada
+_FEED_TIMEOUT = aiohttp.ClientTimeout(total=15, connect=5, sock_read=10)
+
+# Código de extensión MessagePack para las fechas de publicación (segundos desde epoch, float64)
+_DATETIME_EXT = 1
+_EPOCH = struct.Struct(">d")
+
+# Expresión para limpiar etiquetas HTML cuando lxml no puede parsear la descripción
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def _pack_default(obj):
+    """Serializar tipos no nativos de MessagePack"""
+    if isinstance(obj, datetime):
+        # Las fechas son UTC sin zona: se guarda el epoch para no parsear texto al cargar
+        return msgpack.ExtType(_DATETIME_EXT, _EPOCH.pack(obj.replace(tzinfo=timezone.utc).timestamp()))
+    raise TypeError(f"Tipo no serializable: {type(obj)!r}")
+
+
+def _unpack_ext(code: int, data: bytes):
+    """Reconstruir tipos de extensión al deserializar"""
+    if code == _DATETIME_EXT:
+        return datetime.fromtimestamp(_EPOCH.unpack(data)[0], timezone.utc).replace(tzinfo=None)
+    return msgpack.ExtType(code, data)
+
+
+class NewsItem(NamedTuple):
+    """Noticia normalizada; inmutable, así que puede compartirse entre ejecuciones del script"""
+
+    title: str
+    link: str
+    description: str
+    published: datetime
+    source: str
+    author: str
+    # Campos en minúsculas precalculados para la búsqueda
+    title_lc: str
+    desc_lc: str
+    # Marca de tiempo negada (orden ascendente) precalculada para filtrar por fecha
+    neg_ts: float
 
 
 class NewsCache:
     """Gestión de caché de noticias"""
 
     @staticmethod
-    def load_cache() -> Dict:
-        """Cargar caché desde archivo"""
-        if CACHE_FILE.exists():
+    @st.cache_resource(ttl=CACHE_DURATION, max_entries=1, show_spinner=False)
+    def _read_cache_file(mtime_ns: int) -> Dict:
+        """Leer el archivo de caché (memorizado en proceso por fecha de modificación)"""
+        # cache_resource no copia el resultado: las noticias son inmutables y se comparten
+        try:
+            with open(CACHE_FILE, "rb") as f:
+                # Las fechas se reconstruyen como datetime al deserializar
+                cache_data = msgpack.unpackb(f.read(), ext_hook=_unpack_ext)
+            if cache_data.get("version") != CACHE_VERSION:
+                return None
+            # Cada noticia se guarda como una lista con los campos de NewsItem en orden
+            cache_data["news"] = [NewsItem._make(row) for row in cache_data["news"]]
+            return cache_data
+        except ValueError as e:
+            # Si el caché está corrupto, eliminarlo
             try:
-                with open(CACHE_FILE, "r", encoding="utf-8") as f:
-                    cache_data = json.load(f)
-                    # Verificar si el caché ha expirado
-                    if time.time() - cache_data.get("timestamp", 0) < CACHE_DURATION:
-                        # Convertir strings de fecha de vuelta a datetime
-                        for item in cache_data.get("news", []):
-                            if "published" in item and isinstance(item["published"], str):
-                                item["published"] = datetime.fromisoformat(item["published"])
-                        return cache_data
-            except json.JSONDecodeError as e:
-                # Si el caché está corrupto, eliminarlo
-                try:
-                    CACHE_FILE.unlink()
-                except:
-                    pass
-            except Exception as e:
-                st.warning(f"Error al cargar caché: {e}")
+                CACHE_FILE.unlink()
+            except:
+                pass
+        except Exception as e:
+            st.warning(f"Error al cargar caché: {e}")
         return None
 
     @staticmethod
-    def save_cache(news_items: List[Dict]):
+    def load_cache(allow_expired: bool = False) -> Dict:
+        """Cargar caché desde archivo (caducado solo si se pide, para las peticiones condicionales)"""
+        try:
+            mtime_ns = CACHE_FILE.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        cache_data = NewsCache._read_cache_file(mtime_ns)
+        # Verificar si el caché ha expirado
+        if cache_data and (allow_expired or time.time() - cache_data.get("timestamp", 0) < CACHE_DURATION):
+            return cache_data
+        return None
+
+    @staticmethod
+    def save_cache(news_items: List[NewsItem], feed_meta: Dict[str, Dict]):
         """Guardar caché en archivo"""
         try:
-            # Crear una copia de los items para no modificar los originales
-            serializable_items = []
-            for item in news_items:
-                item_copy = item.copy()
-                # Convertir datetime a string ISO format
-                if "published" in item_copy and isinstance(item_copy["published"], datetime):
-                    item_copy["published"] = item_copy["published"].isoformat()
-                serializable_items.append(item_copy)
-
-            cache_data = {"timestamp": time.time(), "news": serializable_items}
-            with open(CACHE_FILE, "w", encoding="utf-8") as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
+            cache_data = {"version": CACHE_VERSION, "timestamp": time.time(), "news": news_items, "_feed_meta": feed_meta}
+            with open(CACHE_FILE, "wb") as f:
+                f.write(msgpack.packb(cache_data, default=_pack_default))
         except Exception as e:
             st.warning(f"Error al guardar caché: {e}")
 
 
-async def fetch_feed(session: aiohttp.ClientSession, name: str, url: str) -> List[Dict]:
-    """Obtener y parsear un feed RSS de forma asíncrona"""
+def _strip_html(description: str) -> str:
+    """Eliminar etiquetas HTML y decodificar entidades de la descripción"""
+    if "<" not in description:
+        return description
     try:
-        async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as response:
-            content = await response.text()
-            feed = feedparser.parse(content)
-
-            news_items = []
-            for entry in feed.entries:
-                # Extraer fecha de publicación
-                pub_date = None
-                if hasattr(entry, "published_parsed") and entry.published_parsed:
-                    pub_date = datetime(*entry.published_parsed[:6])
-                elif hasattr(entry, "updated_parsed") and entry.updated_parsed:
-                    pub_date = datetime(*entry.updated_parsed[:6])
-                else:
-                    pub_date = datetime.now()
-
-                # Extraer descripción
-                description = ""
-                if hasattr(entry, "description"):
-                    description = entry.description
-                elif hasattr(entry, "summary"):
-                    description = entry.summary
-
-                # Limpiar HTML tags básicos de la descripción
-                import re
-
-                description = re.sub(r"<[^>]+>", "", description)
-                description = description.strip()
-
-                news_item = {
-                    "title": entry.title if hasattr(entry, "title") else "Sin título",
-                    "link": entry.link if hasattr(entry, "link") else "",
-                    "description": description[:300] + "..." if len(description) > 300 else description,
-                    "published": pub_date,
-                    "source": name,
-                    "author": entry.author if hasattr(entry, "author") else name,
-                }
-
-                news_items.append(news_item)
-
-            return news_items
+        return lxml.html.fromstring(description).text_content()
+    except etree.LxmlError:
+        return _TAG_RE.sub("", description)
+
+
+def _build_news_item(name: str, title: str, link: str, description: str, pub_date: datetime, author: str) -> "NewsItem":
+    """Construir un item de noticia a partir de los campos extraídos del feed"""
+    # Limpiar HTML tags básicos de la descripción
+    description = _strip_html(description).strip()
+    description = description[:300] + "..." if len(description) > 300 else description
+    title = title or "Sin título"
+
+    return NewsItem(
+        title=title,
+        link=link,
+        description=description,
+        published=pub_date,
+        source=name,
+        author=author or name,
+        title_lc=title.lower(),
+        desc_lc=description.lower(),
+        # La fecha es UTC sin zona: timestamp() la interpretaría como hora local
+        neg_ts=-pub_date.replace(tzinfo=timezone.utc).timestamp(),
+    )
 
-    except Exception as e:
-        st.warning(f"Error al obtener {name}: {e}")
-        return []
+
+def _find_text(element, *paths: str) -> str:
+    """Devolver el primer texto no vacío de las rutas indicadas"""
+    for path in paths:
+        text = element.findtext(path)
+        if text and text.strip():
+            return text.strip()
+    return ""
+
+
+def _utcnow() -> datetime:
+    """Hora actual como datetime UTC sin zona horaria, igual que las fechas de publicación"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
 
-async def fetch_all_feeds() -> List[Dict]:
-    """Obtener todos los feeds de forma concurrente"""
-    async with aiohttp.ClientSession() as session:
-        tasks = [fetch_feed(session, name, url) for name, url in RSS_FEEDS.items()]
+def _parse_date(value: str) -> datetime:
+    """Convertir una fecha RFC 822 (RSS) o ISO 8601 (Atom) a datetime UTC sin zona horaria"""
+    try:
+        pub_date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            # Python 3.11+ acepta la "Z" final directamente
+            pub_date = datetime.fromisoformat(value)
+        except ValueError:
+            return _utcnow()
+
+    if pub_date.tzinfo is not None:
+        pub_date = pub_date.astimezone(timezone.utc).replace(tzinfo=None)
+    return pub_date
+
+
+def _parse_feed_lxml(content: bytes, source: str) -> List[NewsItem]:
+    """Parsear un feed RSS/Atom en streaming con lxml"""
+    news_items = []
+    # Solo se expanden entidades declaradas en el propio documento y nunca se accede a la red
+    parser_events = etree.iterparse(
+        BytesIO(content), events=("end",), tag=("item", "{*}entry"), resolve_entities="internal", no_network=True
+    )
+    for _, entry in parser_events:
+        # Atom guarda el enlace en el atributo href
+        link = _find_text(entry, "link")
+        if not link:
+            for link_el in entry.iterfind("{*}link"):
+                if link_el.get("rel", "alternate") == "alternate":
+                    link = link_el.get("href", "")
+                    break
+
+        pub_str = _find_text(entry, "pubDate", "{*}published", "{*}updated")
+
+        news_items.append(
+            _build_news_item(
+                source,
+                title=_find_text(entry, "title", "{*}title"),
+                link=link,
+                description=_find_text(entry, "description", "{*}summary"),
+                pub_date=_parse_date(pub_str) if pub_str else _utcnow(),
+                author=_find_text(entry, "author", "{*}author/{*}name", "{*}creator"),
+            )
+        )
+
+        # Liberar el elemento ya procesado
+        entry.clear()
+        # Eliminar también los elementos anteriores para que la memoria no crezca en feeds largos
+        while entry.getprevious() is not None:
+            del entry.getparent()[0]
+
+    return news_items
+
+
+def _parse_feed_feedparser(content: bytes, source: str) -> List[NewsItem]:
+    """Parsear un feed con feedparser (más lento, pero tolerante a XML mal formado)"""
+    feed = feedparser.parse(content)
+
+    news_items = []
+    for entry in feed.entries:
+        # Extraer fecha de publicación
+        pub_parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+        pub_date = datetime(*pub_parsed[:6]) if pub_parsed else _utcnow()
+
+        # Extraer descripción
+        description = entry.get("description") or entry.get("summary") or ""
+
+        news_items.append(
+            _build_news_item(
+                source,
+                title=entry.get("title") or "Sin título",
+                link=entry.get("link") or "",
+                description=description,
+                pub_date=pub_date,
+                author=entry.get("author") or source,
+            )
+        )
+
+    return news_items
+
+
+def _parse_feed(content: bytes, source: str) -> List[NewsItem]:
+    """Parsear un feed con lxml, recurriendo a feedparser si el XML no es válido o tiene un formato desconocido"""
+    try:
+        news_items = _parse_feed_lxml(content, source)
+    except etree.XMLSyntaxError:
+        return _parse_feed_feedparser(content, source)
+
+    # Sin items RSS ni entradas Atom (p. ej. RSS 1.0/RDF): feedparser conoce más formatos
+    return news_items or _parse_feed_feedparser(content, source)
+
+
+@st.cache_resource
+def _get_parse_executor() -> ThreadPoolExecutor:
+    """Hilos para parsear los feeds fuera del event loop (compartidos entre ejecuciones del script)"""
+    return ThreadPoolExecutor(max_workers=len(RSS_FEEDS), thread_name_prefix="feed-parser")
+
+
+async def fetch_feed(
+    session: aiohttp.ClientSession, name: str, url: str, meta: Dict, cached_items: List[NewsItem]
+) -> Tuple[List[NewsItem], Dict]:
+    """Obtener y parsear un feed RSS de forma asíncrona, junto con sus cabeceras de validación"""
+    # Petición condicional con los validadores de la última descarga
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        async with session.get(url, headers=headers, timeout=_FEED_TIMEOUT) as response:
+            if response.status == 304:
+                # El feed no ha cambiado: reutilizar las noticias del caché sin descargar ni parsear
+                return cached_items, meta
+
+            if response.status != 200:
+                # Las páginas de error no se parsean ni se guardan: se siguen sirviendo las últimas noticias
+                st.warning(f"Error al obtener {name}: HTTP {response.status}")
+                return cached_items, meta
+
+            # Bytes sin decodificar: el propio XML declara su codificación
+            content = await response.read()
+            loop = asyncio.get_running_loop()
+            news = await loop.run_in_executor(_get_parse_executor(), _parse_feed, content, name)
+            new_meta = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+            return news, new_meta
+
+    except Exception as e:
+        st.warning(f"Error al obtener {name}: {e}")
+        return cached_items, meta
+
+
+async def fetch_all_feeds(previous: Optional[Dict] = None) -> Tuple[List[NewsItem], Dict[str, Dict]]:
+    """Obtener todos los feeds de forma concurrente, reutilizando los que no han cambiado"""
+    previous = previous or {}
+    feed_meta = previous.get("_feed_meta", {})
+    cached_by_source: Dict[str, List[NewsItem]] = {}
+    for item in previous.get("news", []):
+        cached_by_source.setdefault(item.source, []).append(item)
+
+    # asyncio.run crea un loop nuevo en cada actualización, así que la sesión
+    # solo vive lo que dura la descarga; el conector reutiliza conexiones y DNS
+    connector = aiohttp.TCPConnector(limit=100, limit_per_host=10, ttl_dns_cache=600, enable_cleanup_closed=True)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        tasks = [
+            fetch_feed(session, name, url, feed_meta.get(url, {}), cached_by_source.get(name, []))
+            for name, url in RSS_FEEDS.items()
+        ]
         results = await asyncio.gather(*tasks)
 
         # Combinar todos los resultados
         all_news = []
-        for news_list in results:
+        new_meta = {}
+        for url, (news_list, meta) in zip(RSS_FEEDS.values(), results):
             all_news.extend(news_list)
+            new_meta[url] = meta
 
-        return all_news
+        return all_news, new_meta
 
 
-def get_news() -> List[Dict]:
-    """Obtener noticias (desde caché o haciendo peticiones)"""
+def get_news() -> Tuple[List[NewsItem], float]:
+    """Obtener noticias (desde caché o haciendo peticiones) y el momento en que se obtuvieron"""
     # Intentar cargar desde caché
     cache = NewsCache.load_cache()
     if cache and "news" in cache:
-        return cache["news"]
+        return cache["news"], cache["timestamp"]
 
-    # Si no hay caché válido, obtener noticias
+    # Si no hay caché válido, obtener noticias (el caché caducado aporta ETag y Last-Modified)
     with st.spinner("Obteniendo noticias..."):
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        news_items = loop.run_until_complete(fetch_all_feeds())
-        loop.close()
+        news_items, feed_meta = asyncio.run(
+            fetch_all_feeds(NewsCache.load_cache(allow_expired=True)), loop_factory=_LOOP_FACTORY
+        )
+        # Ordenar una sola vez; el orden se conserva en el caché
+        news_items.sort(key=attrgetter("published"), reverse=True)
 
         # Guardar en caché
-        NewsCache.save_cache(news_items)
+        NewsCache.save_cache(news_items, feed_meta)
 
-        return news_items
+        return news_items, time.time()
 
 
-def filter_by_time(news_items: List[Dict], hours: int = None) -> List[Dict]:
-    """Filtrar noticias por tiempo"""
+def filter_by_time(news_items: List[NewsItem], hours: Optional[int]) -> List[NewsItem]:
+    """Filtrar noticias por tiempo (las noticias deben estar ordenadas de más recientes a más antiguas)"""
     if hours is None:
         return news_items
 
-    cutoff_time = datetime.now() - timedelta(hours=hours)
-    return [item for item in news_items if item["published"] >= cutoff_time]
-
+    # bisect necesita orden ascendente, así que se compara con las marcas de tiempo negadas
+    cutoff_ts = -(time.time() - hours * 3600)
+    return news_items[: bisect.bisect_right(news_items, cutoff_ts, key=attrgetter("neg_ts"))]
 
-def filter_by_search(news_items: List[Dict], search_term: str) -> List[Dict]:
-    """Filtrar noticias por término de búsqueda"""
-    if not search_term:
-        return news_items
 
+def filter_news(news_items: List[NewsItem], sources: Optional[FrozenSet[str]], search_term: str) -> List[NewsItem]:
+    """Filtrar noticias por fuente y término de búsqueda en una sola pasada"""
     search_term = search_term.lower()
-    return [item for item in news_items if search_term in item["title"].lower() or search_term in item["description"].lower()]
 
+    # Predicados ordenados de más barato a más caro
+    return [
+        item
+        for item in news_items
+        if (sources is None or item.source in sources)
+        and (not search_term or search_term in item.title_lc or search_term in item.desc_lc)
+    ]
+
+
+def format_time_ago(age_minutes: int) -> str:
+    """Convertir los minutos transcurridos desde la publicación en texto legible"""
+    days, minutes = divmod(age_minutes, 1440)
+    if days > 0:
+        return f"hace {days} día{'s' if days > 1 else ''}"
+    elif minutes >= 60:
+        hours = minutes // 60
+        return f"hace {hours} hora{'s' if hours > 1 else ''}"
+    else:
+        return f"hace {minutes} minuto{'s' if minutes > 1 else ''}"
 
-def filter_by_source(news_items: List[Dict], sources: List[str]) -> List[Dict]:
-    """Filtrar noticias por fuente"""
-    if not sources or len(sources) == len(RSS_FEEDS):
-        return news_items
 
-    return [item for item in news_items if item["source"] in sources]
+@st.cache_resource
+def _cached_time_ago():
+    """Versión memorizada de format_time_ago que sobrevive a las ejecuciones del script"""
+    # El texto solo depende de los minutos completos, así que se memoriza por ese valor
+    return functools.lru_cache(maxsize=4096)(format_time_ago)
 
 
-def display_news_item(item: Dict):
+def display_news_item(item: "NewsItem", time_str: str):
     """Mostrar un item de noticia con formato mejorado"""
-    # Calcular tiempo transcurrido
-    time_diff = datetime.now() - item["published"]
-    if time_diff.days > 0:
-        time_str = f"hace {time_diff.days} día{'s' if time_diff.days > 1 else ''}"
-    elif time_diff.seconds >= 3600:
-        hours = time_diff.seconds // 3600
-        time_str = f"hace {hours} hora{'s' if hours > 1 else ''}"
-    else:
-        minutes = time_diff.seconds // 60
-        time_str = f"hace {minutes} minuto{'s' if minutes > 1 else ''}"
-
     with st.container():
         col1, col2 = st.columns([0.95, 0.05])
 
         with col1:
-            st.markdown(f"### [{item['title']}]({item['link']})")
-            st.markdown(f"**Fuente:** {item['source']} | **Publicado:** {time_str}")
-            st.markdown(f"{item['description']}")
+            st.markdown(f"### [{item.title}]({item.link})")
+            st.markdown(f"**Fuente:** {item.source} | **Publicado:** {time_str}")
+            st.markdown(f"{item.description}")
 
         st.markdown("---")
 
@@ -245,39 +462,42 @@ def main():
                 CACHE_FILE.unlink()
             st.rerun()
 
-        # Info sobre caché
-        if CACHE_FILE.exists():
-            cache_data = NewsCache.load_cache()
-            if cache_data:
-                cache_age = time.time() - cache_data["timestamp"]
-                st.info(f"⏱️ Caché: {int(cache_age)} segundos de antigüedad")
-
     # Obtener y procesar noticias
-    news_items = get_news()
+    news_items, fetched_at = get_news()
+
+    # Info sobre caché
+    cache_age = time.time() - fetched_at
+    st.sidebar.info(f"⏱️ Caché: {int(cache_age)} segundos de antigüedad")
 
     # Aplicar filtros
     filtered_news = filter_by_time(news_items, time_map[time_filter])
-    filtered_news = filter_by_search(filtered_news, search_term)
-    filtered_news = filter_by_source(filtered_news, selected_sources)
+    # Sin selección o con todas las fuentes seleccionadas no hace falta filtrar por fuente
+    sources = frozenset(selected_sources) if selected_sources and len(selected_sources) < len(RSS_FEEDS) else None
+    filtered_news = filter_news(filtered_news, sources, search_term)
 
-    # Ordenar
-    reverse = sort_order == "Más recientes primero"
-    filtered_news = sorted(filtered_news, key=lambda x: x["published"], reverse=reverse)
+    # Ordenar (el caché ya está ordenado de más recientes a más antiguas)
+    if sort_order == "Más antiguas primero":
+        filtered_news = filtered_news[::-1]
 
     # Mostrar estadísticas
     col1, col2 = st.columns(2)
     with col1:
         st.metric("📰 Total Noticias", len(filtered_news))
     with col2:
-        sources_count = len(set(item["source"] for item in filtered_news))
+        sources_count = len(set(item.source for item in filtered_news))
         st.metric("📡 Fuentes", sources_count)
 
     st.markdown("---")
 
     # Mostrar noticias
     if filtered_news:
-        for item in filtered_news:
-            display_news_item(item)
+        # Calcular la antigüedad de todas las noticias con una sola suma vectorizada sobre las
+        # marcas de tiempo negadas ya precalculadas (sin convertir cada datetime)
+        neg_ts = np.fromiter((item.neg_ts for item in filtered_news), np.float64, len(filtered_news))
+        age_minutes = ((time.time() + neg_ts) // 60).astype(np.int64)
+        time_ago = _cached_time_ago()
+        for item, age in zip(filtered_news, age_minutes.tolist()):
+            display_news_item(item, time_ago(age))
     else:
         st.info("No se encontraron noticias con los filtros seleccionados.")
 
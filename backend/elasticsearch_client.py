@@ -3,9 +3,70 @@ Elasticsearch client for managing cybersecurity news articles.
 """
 import os
 import hashlib
+import functools
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+
+import ciso8601
+import orjson
 from elasticsearch import Elasticsearch, helpers
+from elasticsearch.serializer import OrjsonSerializer
+
+
+@functools.lru_cache(maxsize=64)
+def _build_query_bytes(hours: Optional[int], sources: Optional[Tuple[str, ...]], search: Optional[str], size: int) -> bytes:
+    """Build and serialize a news search request body.
+
+    Time ranges are relative ("now-Nh"), so the same filters always produce
+    the same body and the encoded bytes can be reused across calls.
+
+    Args:
+        hours: Filter news from last N hours
+        sources: Filter by specific sources
+        search: Search term for title/description
+        size: Maximum number of results
+
+    Returns:
+        JSON-encoded search body
+    """
+    query = {"bool": {"must": []}}
+
+    # Time filter
+    if hours:
+        query["bool"]["must"].append({
+            "range": {
+                "published": {
+                    "gte": f"now-{hours}h",
+                    "lte": "now"
+                }
+            }
+        })
+
+    # Source filter
+    if sources:
+        query["bool"]["must"].append({
+            "terms": {"source": list(sources)}
+        })
+
+    # Search filter
+    if search:
+        query["bool"]["must"].append({
+            "multi_match": {
+                "query": search,
+                "fields": ["title^2", "description"],
+                "type": "best_fields"
+            }
+        })
+
+    # If no filters, match all
+    if not query["bool"]["must"]:
+        query = {"match_all": {}}
+
+    return orjson.dumps({
+        "query": query,
+        "sort": [{"published": {"order": "desc"}}],
+        "size": size
+    })
 
 
 class ElasticsearchNewsClient:
@@ -22,7 +83,8 @@ class ElasticsearchNewsClient:
         """
         self.es = Elasticsearch(
             [f"http://{host}:{port}"],
-            request_timeout=30
+            request_timeout=30,
+            serializer=OrjsonSerializer()
         )
         self.index_name = self.INDEX_NAME
         
@@ -68,6 +130,7 @@ class ElasticsearchNewsClient:
             Unique document ID
         """
         link = news_item.get("link", "")
+        # Keep the SHA-256 scheme: the ids of documents already in the index derive from it
         return hashlib.sha256(link.encode()).hexdigest()[:16]
     
     def store_news_item(self, news_item: Dict) -> bool:
@@ -79,36 +142,9 @@ class ElasticsearchNewsClient:
         Returns:
             True if stored successfully, False otherwise
         """
-        try:
-            doc_id = self._generate_doc_id(news_item)
-            
-            # Prepare document
-            doc = {
-                "id": doc_id,
-                "title": news_item.get("title"),
-                "link": news_item.get("link"),
-                "description": news_item.get("description"),
-                "published": news_item.get("published").isoformat() if isinstance(news_item.get("published"), datetime) else news_item.get("published"),
-                "source": news_item.get("source"),
-                "author": news_item.get("author"),
-                "fetched_at": datetime.now().isoformat()
-            }
-            
-            # Use update with upsert to avoid duplicates
-            self.es.update(
-                index=self.index_name,
-                id=doc_id,
-                body={
-                    "doc": doc,
-                    "doc_as_upsert": True
-                }
-            )
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error storing news item: {e}")
-            return False
+        # Single items go through the bulk path as a batch of one
+        success_count, _ = self.bulk_store_news([news_item])
+        return success_count == 1
     
     def bulk_store_news(self, news_items: List[Dict]) -> tuple:
         """Store multiple news items in bulk.
@@ -127,6 +163,7 @@ class ElasticsearchNewsClient:
             doc_id = self._generate_doc_id(item)
             
             doc = {
+                "_op_type": "index",
                 "_index": self.index_name,
                 "_id": doc_id,
                 "_source": {
@@ -144,8 +181,9 @@ class ElasticsearchNewsClient:
         
         try:
             success, failed = helpers.bulk(
-                self.es,
+                self.es.options(request_timeout=60),
                 actions,
+                chunk_size=500,
                 raise_on_error=False,
                 stats_only=False
             )
@@ -178,55 +216,23 @@ class ElasticsearchNewsClient:
         Returns:
             List of news items
         """
-        query = {"bool": {"must": []}}
-        
-        # Time filter
-        if hours:
-            query["bool"]["must"].append({
-                "range": {
-                    "published": {
-                        "gte": f"now-{hours}h",
-                        "lte": "now"
-                    }
-                }
-            })
-        
-        # Source filter
-        if sources:
-            query["bool"]["must"].append({
-                "terms": {"source": sources}
-            })
-        
-        # Search filter
-        if search:
-            query["bool"]["must"].append({
-                "multi_match": {
-                    "query": search,
-                    "fields": ["title^2", "description"],
-                    "type": "best_fields"
-                }
-            })
-        
-        # If no filters, match all
-        if not query["bool"]["must"]:
-            query = {"match_all": {}}
+        body = _build_query_bytes(hours, tuple(sources) if sources else None, search, size)
         
         try:
-            response = self.es.search(
-                index=self.index_name,
-                body={
-                    "query": query,
-                    "sort": [{"published": {"order": "desc"}}],
-                    "size": size
-                }
+            # Send the pre-encoded body through the low-level request path
+            response = self.es.perform_request(
+                "POST",
+                f"/{self.index_name}/_search",
+                headers={"accept": "application/json", "content-type": "application/json"},
+                body=body
             )
             
             news_items = []
             for hit in response["hits"]["hits"]:
                 item = hit["_source"]
-                # Convert published back to datetime for consistency
+                # Convert published back to datetime for consistency (the C parser accepts "Z" as is)
                 if "published" in item:
-                    item["published"] = datetime.fromisoformat(item["published"].replace('Z', '+00:00'))
+                    item["published"] = ciso8601.parse_datetime(item["published"])
                 news_items.append(item)
             
             return news_items
@@ -253,7 +259,7 @@ class ElasticsearchNewsClient:
             
             if response["hits"]["hits"]:
                 fetched_at = response["hits"]["hits"][0]["_source"]["fetched_at"]
-                return datetime.fromisoformat(fetched_at.replace('Z', '+00:00'))
+                return ciso8601.parse_datetime(fetched_at)
             
             return None
             
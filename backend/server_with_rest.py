@@ -4,25 +4,49 @@ MCP Server with REST API wrapper for Streamlit frontend.
 Runs both MCP (SSE) and REST API on the same port.
 """
 import asyncio
-from fastapi import FastAPI
+import hashlib
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional
+import orjson
 import uvicorn
 
 # Import MCP server functions
 from mcp_server import (
+    _close_session,
     _fetch_all_feeds,
+    _get_session,
     _filter_by_time,
     _filter_by_search,
     _filter_by_sources,
-    _format_json,
     _format_markdown,
+    _serialize_item,
+    _utcnow,
     RSS_FEEDS,
 )
 
+# RSS_FEEDS is fixed for the life of the process, so the sources payload is encoded once
+_SOURCES_BYTES = orjson.dumps({
+    "total_sources": len(RSS_FEEDS),
+    "sources": [{"name": name, "feed_url": url} for name, url in RSS_FEEDS.items()],
+})
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open one pooled HTTP session for feed fetches and close it on shutdown."""
+    app.state.http = await _get_session()
+    try:
+        yield
+    finally:
+        await _close_session()
+
+
 # Create FastAPI app
-app = FastAPI(title="Cybersecurity News API")
+app = FastAPI(title="Cybersecurity News API", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -46,6 +70,30 @@ class ListSourcesRequest(BaseModel):
     response_format: str = "json"
 
 
+def _news_etag(request: GetNewsRequest, news_items: List[Dict]) -> str:
+    """Weak ETag over the query and the articles it matched."""
+    digest = hashlib.blake2b(orjson.dumps(request.model_dump()), digest_size=16)
+    digest.update(
+        orjson.dumps(
+            [
+                (item["link"], item["published_epoch"], item["title"], item["description"], item["author"], item["source"])
+                for item in news_items
+            ]
+        )
+    )
+    # Weak because time_ago drifts while the article list stays the same
+    return f'W/"{digest.hexdigest()}"'
+
+
+async def _iter_news_json(news_items: List[Dict]) -> AsyncIterator[bytes]:
+    """Yield the news payload as JSON, one serialized article at a time."""
+    yield b'{"total_count":%d,"news_items":[' % len(news_items)
+    now = _utcnow()
+    for i, item in enumerate(news_items):
+        yield (b"," if i else b"") + orjson.dumps(_serialize_item(item, now))
+    yield b"]}"
+
+
 # REST API Endpoints
 @app.get("/")
 async def root():
@@ -66,26 +114,27 @@ async def health_check():
 
 
 @app.post("/api/news")
-async def get_news(request: GetNewsRequest):
+async def get_news(request: GetNewsRequest, http_request: Request):
     """Get cybersecurity news with filters."""
     try:
-        # Fetch news from RSS feeds
-        news_items = await _fetch_all_feeds()
+        # Fetch news from RSS feeds over the app-wide session
+        news_items = await _fetch_all_feeds(http_request.app.state.http)
         
-        # Apply filters
+        # Apply filters; they keep the newest-first order from _fetch_all_feeds
         filtered_news = _filter_by_time(news_items, request.hours)
         filtered_news = _filter_by_search(filtered_news, request.search)
         filtered_news = _filter_by_sources(filtered_news, request.sources)
         
-        # Sort by publication date (newest first)
-        filtered_news = sorted(filtered_news, key=lambda x: x["published"], reverse=True)
-        
         # Format response
         if request.response_format == "markdown":
             return {"content": _format_markdown(filtered_news)}
         else:
-            import json
-            return json.loads(_format_json(filtered_news))
+            etag = _news_etag(request, filtered_news)
+            if http_request.headers.get("if-none-match") == etag:
+                return Response(status_code=304, headers={"ETag": etag})
+            return StreamingResponse(
+                _iter_news_json(filtered_news), media_type="application/json", headers={"ETag": etag}
+            )
             
     except Exception as e:
         return {"error": str(e)}
@@ -94,17 +143,7 @@ async def get_news(request: GetNewsRequest):
 @app.get("/api/sources")
 async def list_sources():
     """List all available news sources."""
-    try:
-        sources = [
-            {"name": name, "feed_url": url}
-            for name, url in RSS_FEEDS.items()
-        ]
-        return {
-            "total_sources": len(sources),
-            "sources": sources
-        }
-    except Exception as e:
-        return {"error": str(e)}
+    return Response(content=_SOURCES_BYTES, media_type="application/json")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Offline checks for the feed parser.
+Feeds small RSS 2.0, Atom, RSS 1.0 (RDF) and malformed documents to _parse_feed,
+so the lxml paths and the feedparser fallbacks are covered without network access.
+"""
+from datetime import datetime
+from typing import Dict, List
+
+from mcp_server import _parse_feed
+
+PARSERS = {"mcp_server": _parse_feed}
+
+
+RSS_FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/">
+<channel><title>Channel</title>
+<item>
+  <title>Ransomware &amp; more</title>
+  <link>https://example.com/rss/1</link>
+  <description><![CDATA[<p>New <b>ransomware</b> strain</p>]]></description>
+  <pubDate>Tue, 13 Oct 2026 10:00:00 +0200</pubDate>
+  <dc:creator>Alice</dc:creator>
+</item>
+<item>
+  <title>Second</title>
+  <link>https://example.com/rss/2</link>
+  <description>plain text</description>
+  <pubDate>Wed, 14 Oct 2026 08:00:00 GMT</pubDate>
+  <author>bob@example.com</author>
+</item>
+</channel></rss>"""
+ATOM_FEED = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+<title>Atom feed</title>
+<entry>
+  <title>Atom entry</title>
+  <link rel="self" href="https://example.com/atom/1.xml"/>
+  <link href="https://example.com/atom/1"/>
+  <summary>Atom summary</summary>
+  <updated>2026-10-14T07:00:00Z</updated>
+  <author><name>Carol</name></author>
+</entry>
+</feed>"""
+LATIN1_FEED = '<?xml version="1.0" encoding="ISO-8859-1"?><rss version="2.0"><channel><item><title>Café</title><link>https://example.com/latin/1</link><pubDate>Wed, 14 Oct 2026 08:00:00 GMT</pubDate></item></channel></rss>'.encode("iso-8859-1")
+RDF_FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns="http://purl.org/rss/1.0/" xmlns:dc="http://purl.org/dc/elements/1.1/">
+<channel rdf:about="https://example.com/"><title>RDF feed</title></channel>
+<item rdf:about="https://example.com/rdf/1">
+  <title>RDF item</title>
+  <link>https://example.com/rdf/1</link>
+  <description>RDF description</description>
+  <dc:date>2026-10-14T06:00:00Z</dc:date>
+  <dc:creator>Dave</dc:creator>
+</item>
+</rdf:RDF>"""
+BROKEN_FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel>
+<item><title>Broken &amp; bad</title><link>https://example.com/bad/1</link><description>unclosed <b>tag</description></item>
+</channel>"""
+
+
+def _fields(items) -> List[Dict]:
+    """Parsed items as plain dicts, whether the parser returns dicts or named tuples."""
+    return [item if isinstance(item, dict) else item._asdict() for item in items]
+
+
+def test_rss2():
+    """RSS 2.0: entities, CDATA HTML, offset dates, dc:creator and <author>."""
+    for name, parse in PARSERS.items():
+        first, second = _fields(parse(RSS_FEED, "RSS"))
+        assert first["title"] == "Ransomware & more", name
+        assert first["link"] == "https://example.com/rss/1", name
+        assert first["description"] == "New ransomware strain", name
+        assert first["published"] == datetime(2026, 10, 13, 8, 0), name
+        assert first["author"] == "Alice", name
+        assert first["source"] == "RSS", name
+        assert second["author"] == "bob@example.com", name
+        assert second["published"] == datetime(2026, 10, 14, 8, 0), name
+
+
+def test_atom():
+    """Atom: the alternate href link, namespaced title/summary/author and a "Z" date."""
+    for name, parse in PARSERS.items():
+        (entry,) = _fields(parse(ATOM_FEED, "Atom"))
+        assert entry["title"] == "Atom entry", name
+        assert entry["link"] == "https://example.com/atom/1", name
+        assert entry["description"] == "Atom summary", name
+        assert entry["published"] == datetime(2026, 10, 14, 7, 0), name
+        assert entry["author"] == "Carol", name
+
+
+def test_declared_encoding():
+    """Raw bytes are decoded with the encoding the XML declaration names."""
+    for name, parse in PARSERS.items():
+        (item,) = _fields(parse(LATIN1_FEED, "Latin"))
+        assert item["title"] == "Café", name
+        # No author in the feed: the source name stands in
+        assert item["author"] == "Latin", name
+
+
+def test_rdf_fallback():
+    """RSS 1.0 items are namespaced, so lxml finds none and feedparser takes over."""
+    for name, parse in PARSERS.items():
+        (item,) = _fields(parse(RDF_FEED, "RDF"))
+        assert item["title"] == "RDF item", name
+        assert item["link"] == "https://example.com/rdf/1", name
+        assert item["description"] == "RDF description", name
+        assert item["published"] == datetime(2026, 10, 14, 6, 0), name
+        assert item["author"] == "Dave", name
+
+
+def test_malformed_fallback():
+    """Invalid XML raises XMLSyntaxError in lxml and is parsed by feedparser instead."""
+    for name, parse in PARSERS.items():
+        (item,) = _fields(parse(BROKEN_FEED, "Broken"))
+        assert item["title"] == "Broken & bad", name
+        assert item["link"] == "https://example.com/bad/1", name
+        assert item["description"] == "unclosed tag", name
+
+
+def main():
+    """Run all checks."""
+    print("\n🧪 Testing feed parsing offline\n")
+
+    for check in (test_rss2, test_atom, test_declared_encoding, test_rdf_fallback, test_malformed_fallback):
+        check()
+        print(f"✅ {check.__doc__.splitlines()[0]}")
+
+    print("=" * 80)
+    print("✅ All parser checks passed!")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
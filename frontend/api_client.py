@@ -1,8 +1,14 @@
 """
 Simple REST API client for communicating with the backend.
 """
-import requests
-from typing import Dict, List, Optional
+import threading
+
+import httpx
+import orjson
+from typing import Dict, List, Optional, Tuple
+
+# Distinct news queries whose ETag and body are kept for conditional requests
+_ETAG_CACHE_SIZE = 32
 
 
 class NewsAPIClient:
@@ -15,6 +21,20 @@ class NewsAPIClient:
             base_url: Base URL of the API server
         """
         self.base_url = base_url.rstrip('/')
+        # One pooled client so every Streamlit rerun reuses the same keep-alive connections
+        self._client = httpx.Client(
+            base_url=self.base_url,
+            limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+            timeout=30.0
+        )
+        # Encoded query -> (ETag, parsed body) of the last full /api/news response
+        self._news_etags: Dict[bytes, Tuple[str, Dict]] = {}
+        # The client is shared by every Streamlit session thread
+        self._news_etags_lock = threading.Lock()
+    
+    def close(self):
+        """Close the underlying HTTP connections."""
+        self._client.close()
         
     def get_news(
         self,
@@ -45,17 +65,39 @@ class NewsAPIClient:
         if search:
             payload["search"] = search
         
+        body = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+        with self._news_etags_lock:
+            cached = self._news_etags.get(body)
+        headers = {"Content-Type": "application/json"}
+        if cached:
+            headers["If-None-Match"] = cached[0]
+        
         try:
-            response = requests.post(
-                f"{self.base_url}/api/news",
-                json=payload,
+            response = self._client.post(
+                "/api/news",
+                content=body,
+                headers=headers,
                 timeout=60
             )
             
+            # Unchanged since the last identical query: reuse the stored body
+            if response.status_code == 304 and cached:
+                return cached[1]
+            
             response.raise_for_status()
-            return response.json()
+            result = orjson.loads(response.content)
+            
+            etag = response.headers.get("ETag")
+            if etag:
+                with self._news_etags_lock:
+                    self._news_etags.pop(body, None)
+                    if len(self._news_etags) >= _ETAG_CACHE_SIZE:
+                        # Drop the least recently stored query
+                        del self._news_etags[next(iter(self._news_etags))]
+                    self._news_etags[body] = (etag, result)
+            return result
             
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
             return {"error": str(e)}
     
     def list_sources(self) -> Dict:
@@ -65,15 +107,15 @@ class NewsAPIClient:
             Dict with sources or error
         """
         try:
-            response = requests.get(
-                f"{self.base_url}/api/sources",
+            response = self._client.get(
+                "/api/sources",
                 timeout=10
             )
             
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
             
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
             return {"error": str(e)}
     
     def health_check(self) -> bool:
@@ -83,8 +125,8 @@ class NewsAPIClient:
             True if server is healthy, False otherwise
         """
         try:
-            response = requests.get(
-                f"{self.base_url}/health",
+            response = self._client.get(
+                "/health",
                 timeout=5
             )
             return response.status_code == 200
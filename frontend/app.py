@@ -1,13 +1,36 @@
 import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict
+from html import escape
+from typing import List, Dict, Optional, Tuple
+from urllib.parse import urlsplit
 
+import numpy as np
 import streamlit as st
-from api_client import get_api_client
+from api_client import NewsAPIClient
 
 # Configuration
 API_SERVER_URL = os.getenv("API_SERVER_URL", "http://localhost:8000")
 
+# Articles rendered per page
+PAGE_SIZE = 20
+
+# How long fetched news is reused, both in the data cache and in a session
+NEWS_TTL_SECONDS = 60
+
+# URL schemes rendered as article links
+_LINK_SCHEMES = frozenset({"http", "https"})
+
+# Shown when the backend's source list cannot be fetched
+FALLBACK_SOURCES = (
+    "BleepingComputer",
+    "The Hacker News",
+    "Wiz Blog",
+    "StepSecurity",
+    "ReversingLabs",
+)
+
 # Page configuration
 st.set_page_config(
     page_title="Cybersecurity News Feed - MCP Client",
@@ -33,49 +56,98 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-def format_time_ago(published_str: str) -> str:
-    """Format ISO timestamp to human-readable time ago."""
-    try:
-        if isinstance(published_str, str):
-            # Remove timezone info if present
-            published_str = published_str.replace('Z', '+00:00')
-            published = datetime.fromisoformat(published_str)
-        else:
-            published = published_str
-        
-        time_diff = datetime.now() - published.replace(tzinfo=None)
-        
-        if time_diff.days > 0:
-            return f"{time_diff.days} day{'s' if time_diff.days > 1 else ''} ago"
-        elif time_diff.seconds >= 3600:
-            hours = time_diff.seconds // 3600
-            return f"{hours} hour{'s' if hours > 1 else ''} ago"
-        else:
-            minutes = time_diff.seconds // 60
-            return f"{minutes} minute{'s' if minutes > 1 else ''} ago"
-    except:
+def format_time_ago(published_epoch: int, now: float) -> str:
+    """Format a UTC epoch timestamp to human-readable time ago."""
+    # 0 stands in for a missing timestamp
+    if not published_epoch:
         return "Unknown"
+    
+    days, seconds = divmod(int(now - published_epoch), 86400)
+    
+    if days > 0:
+        return f"{days} day{'s' if days > 1 else ''} ago"
+    elif seconds >= 3600:
+        hours = seconds // 3600
+        return f"{hours} hour{'s' if hours > 1 else ''} ago"
+    else:
+        minutes = seconds // 60
+        return f"{minutes} minute{'s' if minutes > 1 else ''} ago"
 
 
-def display_news_item(item: Dict):
-    """Display a single news item."""
-    time_ago = format_time_ago(item.get("published", ""))
-    
-    st.markdown(f"### [{item['title']}]({item['link']})")
-    st.markdown(
-        f"**Source:** {item['source']} | **Author:** {item.get('author', 'Unknown')} | "
-        f"**Published:** {time_ago}"
+def _inline_text(text: str) -> str:
+    """Escape feed text for the cards, collapsed onto one line.
+
+    A blank line would end the markdown HTML block, and an indented line after it would render as a code block.
+    """
+    return escape(" ".join(text.split()))
+
+
+def news_item_html(item: Dict, time_ago: str) -> str:
+    """Render a single news item as an HTML card."""
+    title = _inline_text(item["title"])
+    # Links come from the feeds: only web URLs become anchors (no javascript: or data: hrefs)
+    link = item.get("link") or ""
+    if urlsplit(link).scheme.lower() in _LINK_SCHEMES:
+        title = f'<a href="{escape(link)}" target="_blank" rel="noopener noreferrer">{title}</a>'
+    return (
+        f'<div class="news-item">'
+        f'<h3>{title}</h3>'
+        f'<p><b>Source:</b> {_inline_text(item["source"])} | <b>Author:</b> {_inline_text(item.get("author") or "Unknown")} | '
+        f'<b>Published:</b> {time_ago}</p>'
+        f'<p>{_inline_text(item["description"])}</p>'
+        f'</div>'
     )
-    st.markdown(item['description'])
-    st.markdown("---")
 
 
-def display_connection_status(api_client):
+@st.cache_resource
+def get_api_client(base_url: str) -> NewsAPIClient:
+    """One API client, and its connection pool, per backend URL for the whole server process."""
+    return NewsAPIClient(base_url=base_url)
+
+
+@st.cache_resource
+def get_request_executor() -> ThreadPoolExecutor:
+    """Worker threads for issuing independent backend requests concurrently."""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="api-request")
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def cached_source_names(base_url: str) -> Tuple[str, ...]:
+    """Names of the backend's sources; the feed list only changes when the server restarts."""
+    result = get_api_client(base_url).list_sources()
+    if "error" in result or "sources" not in result:
+        # Raising instead of returning keeps the failure out of the cache
+        raise RuntimeError(result.get("error", "unexpected response"))
+    return tuple(s["name"] for s in result["sources"])
+
+
+@st.cache_data(ttl=NEWS_TTL_SECONDS, show_spinner=False)
+def cached_news(base_url: str, hours: int, sources: Optional[Tuple[str, ...]], search: Optional[str]) -> Dict:
+    """Fetch news for one filter combination; sources is a tuple so it can be hashed."""
+    result = get_api_client(base_url).get_news(
+        hours=hours,
+        sources=list(sources) if sources else None,
+        search=search,
+        response_format="json"
+    )
+    if "error" in result:
+        # Raising instead of returning keeps the failure out of the cache
+        raise RuntimeError(result["error"])
+    return result
+
+
+@st.cache_data(ttl=15, show_spinner=False)
+def cached_health(base_url: str) -> bool:
+    """Check backend health at most once every 15 seconds; filter clicks reuse the status."""
+    return get_api_client(base_url).health_check()
+
+
+def display_connection_status(health_future: Future):
     """Display API server connection status."""
     with st.sidebar:
         st.subheader("🔌 Connection Status")
         
-        is_healthy = api_client.health_check()
+        is_healthy = health_future.result()
         
         if is_healthy:
             st.success("✅ Connected to Backend API")
@@ -84,6 +156,99 @@ def display_connection_status(api_client):
             st.info(f"Server URL: {API_SERVER_URL}")
 
 
+@st.fragment
+def render_news(base_url: str, hours: int, sources: Optional[Tuple[str, ...]], search: Optional[str], sort_order: str):
+    """Fetch and render the news list; widgets inside rerun only this fragment."""
+    # Only fetch when the query changed or the stored payload has outlived the cache TTL;
+    # sorting and paging reuse the payload, and an idle tab still picks up new articles
+    news_key = (base_url, hours, sources, search)
+    if (
+        st.session_state.get("news_key") != news_key
+        or time.monotonic() - st.session_state.get("news_fetched_at", 0.0) > NEWS_TTL_SECONDS
+    ):
+        try:
+            with st.spinner("Fetching news from backend API..."):
+                result = cached_news(base_url, hours, sources, search)
+        except RuntimeError as e:
+            # Nothing was cached, so the next rerun retries the request
+            st.session_state.pop("news_key", None)
+            st.error(f"❌ Error fetching news: {e}")
+            st.info("💡 Make sure the backend server is running on http://localhost:8000")
+            return
+        
+        news_items = result.get("news_items", [])
+        
+        # One pass per fetch collects the publication times and the distinct sources
+        published = []
+        sources_seen = set()
+        for item in news_items:
+            published.append(item.get("published_epoch", 0))
+            sources_seen.add(item["source"])
+        
+        st.session_state["news_raw"] = news_items
+        st.session_state["news_epochs"] = np.array(published, dtype=np.int64)
+        st.session_state["news_sources_count"] = len(sources_seen)
+        st.session_state["news_key"] = news_key
+        st.session_state["news_fetched_at"] = time.monotonic()
+    
+    # Get news items
+    news_items = st.session_state["news_raw"]
+    # Publication times for sorting, the statistics and every displayed age
+    epochs = st.session_state["news_epochs"]
+    # One clock read for every age computed on this page
+    now = time.time()
+    
+    # Sort on the integer timestamps (stable, so ties keep the backend's order)
+    order = np.argsort(-epochs if sort_order == "Newest first" else epochs, kind="stable")
+    news_items = [news_items[i] for i in order.tolist()]
+    epochs = epochs[order]
+    
+    # Statistics
+    st.markdown("### 📊 Statistics")
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("📰 Total Articles", len(news_items))
+    
+    with col2:
+        st.metric("📡 Active Sources", st.session_state["news_sources_count"])
+    
+    with col3:
+        # Count from last 24h with one vectorized comparison
+        recent_count = int((epochs > now - 86400).sum())
+        st.metric("🆕 Last 24h", recent_count)
+    
+    st.markdown("---")
+    
+    # Display news
+    if news_items:
+        # Only one page of articles is rendered per run; paging reruns just this fragment
+        page_count = (len(news_items) + PAGE_SIZE - 1) // PAGE_SIZE
+        page = 1
+        if page_count > 1:
+            page = st.number_input("📄 Page", min_value=1, max_value=page_count, value=1, step=1)
+        start = (page - 1) * PAGE_SIZE
+        end = min(start + PAGE_SIZE, len(news_items))
+        
+        if page_count > 1:
+            st.markdown(f"### 📰 Showing articles {start + 1}-{end} of {len(news_items)}")
+        else:
+            st.markdown(f"### 📰 Showing {len(news_items)} article{'s' if len(news_items) > 1 else ''}")
+        
+        # The whole page goes out as one element rather than one per article
+        st.markdown(
+            "\n".join(
+                news_item_html(item, format_time_ago(published_epoch, now))
+                for item, published_epoch in zip(news_items[start:end], epochs[start:end].tolist())
+            ),
+            unsafe_allow_html=True,
+        )
+    else:
+        st.warning("⚠️ No news items found matching your criteria.")
+        st.info("💡 Try adjusting your filters or force refresh to fetch new data.")
+    
+
+
 def main():
     """Main application."""
     
@@ -94,129 +259,84 @@ def main():
     # Initialize API client
     api_client = get_api_client(API_SERVER_URL)
     
+    # The health check and source list are independent, so request them together
+    executor = get_request_executor()
+    health_future = executor.submit(cached_health, api_client.base_url)
+    sources_future = executor.submit(cached_source_names, api_client.base_url)
+    
     # Display connection status
-    display_connection_status(api_client)
+    display_connection_status(health_future)
     
     # Sidebar - Filters
     with st.sidebar:
         st.header("⚙️ Filters")
         
-        # Time filter
-        st.subheader("📅 Time Period")
-        time_filter = st.radio(
-            "Show news from:",
-            ["Last 12 hours", "Last 24 hours", "Last 48 hours", "Last week", "All time"],
-            index=1
-        )
-        
-        time_map = {
-            "Last 12 hours": 12,
-            "Last 24 hours": 24,
-            "Last 48 hours": 48,
-            "Last week": 168,
-            "All time": 720
-        }
+        # Filters only apply on submit, so typing a search doesn't rerun on every edit
+        with st.form("filters"):
+            # Time filter
+            st.subheader("📅 Time Period")
+            time_filter = st.radio(
+                "Show news from:",
+                ["Last 12 hours", "Last 24 hours", "Last 48 hours", "Last week", "All time"],
+                index=1
+            )
         
-        # Get available sources
-        sources_result = api_client.list_sources()
-        available_sources = []
+            time_map = {
+                "Last 12 hours": 12,
+                "Last 24 hours": 24,
+                "Last 48 hours": 48,
+                "Last week": 168,
+                "All time": 720
+            }
         
-        if "error" not in sources_result and "sources" in sources_result:
-            available_sources = [s["name"] for s in sources_result["sources"]]
-        else:
-            # Fallback to known sources
-            available_sources = [
-                "BleepingComputer",
-                "The Hacker News",
-                "Wiz Blog",
-                "StepSecurity",
-                "ReversingLabs"
-            ]
+            # Get available sources
+            try:
+                available_sources = list(sources_future.result())
+            except RuntimeError:
+                # Fallback to known sources
+                available_sources = list(FALLBACK_SOURCES)
         
-        # Source filter
-        st.subheader("📰 Sources")
-        selected_sources = st.multiselect(
-            "Select sources:",
-            options=available_sources,
-            default=available_sources
-        )
+            # Source filter
+            st.subheader("📰 Sources")
+            selected_sources = st.multiselect(
+                "Select sources:",
+                options=available_sources,
+                default=available_sources
+            )
         
-        # Search
-        st.subheader("🔍 Search")
-        search_term = st.text_input("Search keyword:", "")
+            # Search
+            st.subheader("🔍 Search")
+            search_term = st.text_input("Search keyword:", "")
         
-        if search_term:
-            st.caption(f"🔍 Searching: '{search_term}'")
+            if search_term:
+                st.caption(f"🔍 Searching: '{search_term}'")
         
-        # Sorting
-        st.subheader("📊 Sorting")
-        sort_order = st.radio(
-            "Sort by:",
-            ["Newest first", "Oldest first"]
-        )
+            # Sorting
+            st.subheader("📊 Sorting")
+            sort_order = st.radio(
+                "Sort by:",
+                ["Newest first", "Oldest first"]
+            )
+            
+            st.form_submit_button("✅ Apply Filters", use_container_width=True)
         
         # Refresh button
         st.markdown("---")
         if st.button("🔄 Fetch News", use_container_width=True, type="primary"):
+            # Bypass the cached responses for an explicit refresh
+            cached_news.clear()
+            st.session_state.pop("news_key", None)
             st.rerun()
     
-    # Fetch news
-    with st.spinner("Fetching news from backend API..."):
-        result = api_client.get_news(
-            hours=time_map[time_filter],
-            sources=selected_sources if selected_sources else None,
-            search=search_term if search_term else None,
-            response_format="json"
-        )
-    
-    # Handle errors
-    if "error" in result:
-        st.error(f"❌ Error fetching news: {result['error']}")
-        st.info("💡 Make sure the backend server is running on http://localhost:8000")
-        return
-    
-    # Get news items
-    news_items = result.get("news_items", [])
-    
-    # Sort
-    reverse = sort_order == "Newest first"
-    news_items = sorted(
-        news_items,
-        key=lambda x: x.get("published", ""),
-        reverse=reverse
+    # Fetch and display news
+    render_news(
+        api_client.base_url,
+        time_map[time_filter],
+        tuple(selected_sources) if selected_sources else None,
+        search_term if search_term else None,
+        sort_order
     )
     
-    # Statistics
-    st.markdown("### 📊 Statistics")
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.metric("📰 Total Articles", len(news_items))
-    
-    with col2:
-        sources_count = len(set(item["source"] for item in news_items))
-        st.metric("📡 Active Sources", sources_count)
-    
-    with col3:
-        # Count from last 24h
-        recent_count = sum(
-            1 for item in news_items
-            if format_time_ago(item.get("published", "")).endswith(("hour ago", "hours ago", "minute ago", "minutes ago"))
-        )
-        st.metric("🆕 Last 24h", recent_count)
-    
-    st.markdown("---")
-    
-    # Display news
-    if news_items:
-        st.markdown(f"### 📰 Showing {len(news_items)} article{'s' if len(news_items) > 1 else ''}")
-        
-        for item in news_items:
-            display_news_item(item)
-    else:
-        st.warning("⚠️ No news items found matching your criteria.")
-        st.info("💡 Try adjusting your filters or force refresh to fetch new data.")
-    
     # Footer
     st.markdown("---")
     st.markdown(
@@ -1,11 +1,24 @@
 """
 MCP Client for communicating with the MCP Server via HTTP/SSE.
 """
-import json
+from functools import lru_cache
+
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, List, Optional, Any
 
 
+@lru_cache(maxsize=64)
+def _encode_call(tool_name: str, arguments: bytes) -> bytes:
+    """Serialized tools/call body, reused for repeated (tool, arguments) pairs."""
+    return b'{"method":"tools/call","params":{"name":%s,"arguments":%s}}' % (
+        orjson.dumps(tool_name),
+        arguments,
+    )
+
+
 class MCPClient:
     """Client for interacting with MCP Server."""
     
@@ -19,6 +32,23 @@ class MCPClient:
         self.tools_endpoint = f"{self.base_url}/tools"
         self.call_endpoint = f"{self.base_url}/call"
         
+        # Persistent session so tool calls reuse keep-alive connections;
+        # the tools only read data, so POSTs are safe to retry as well
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=2,
+                backoff_factor=0.1,
+                status_forcelist=[502, 503, 504],
+                allowed_methods=frozenset({"GET", "POST"})
+            )
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+        
     def _call_tool(self, tool_name: str, params: Dict = None) -> Any:
         """Call an MCP tool.
         
@@ -32,24 +62,19 @@ class MCPClient:
         Raises:
             Exception: If the request fails
         """
-        payload = {
-            "method": "tools/call",
-            "params": {
-                "name": tool_name,
-                "arguments": params or {}
-            }
-        }
+        # Sorted keys give equal arguments the same bytes, and so the same cache entry
+        body = _encode_call(tool_name, orjson.dumps(params or {}, option=orjson.OPT_SORT_KEYS))
         
         try:
-            response = requests.post(
+            # The session already sends Content-Type: application/json
+            response = self.session.post(
                 f"{self.base_url}/message",
-                json=payload,
-                headers={"Content-Type": "application/json"},
+                data=body,
                 timeout=60
             )
             
             response.raise_for_status()
-            result = response.json()
+            result = orjson.loads(response.content)
             
             # Extract content from MCP response
             if "content" in result:
@@ -59,7 +84,7 @@ class MCPClient:
             
             return result
             
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
             raise Exception(f"MCP request failed: {str(e)}")
     
     def get_news(
@@ -97,7 +122,7 @@ class MCPClient:
             # If response_format is json, parse it
             if response_format == "json":
                 if isinstance(result, str):
-                    return json.loads(result)
+                    return orjson.loads(result)
                 return result
             
             return {"content": result}
@@ -121,7 +146,7 @@ class MCPClient:
             
             if response_format == "json":
                 if isinstance(result, str):
-                    return json.loads(result)
+                    return orjson.loads(result)
                 return result
             
             return {"content": result}
@@ -139,7 +164,7 @@ class MCPClient:
             result = self._call_tool("get_elasticsearch_stats", {})
             
             if isinstance(result, str):
-                return json.loads(result)
+                return orjson.loads(result)
             return result
             
         except Exception as e:
@@ -152,7 +177,7 @@ class MCPClient:
             True if server is healthy, False otherwise
         """
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/health",
                 timeout=5
             )
@@ -1,15 +1,35 @@
+import functools
+import os
 import re
-import json
+import sys
+import heapq
+import time
 from enum import Enum
-from typing import List, Dict, Optional
-from datetime import datetime, timedelta
+from io import BytesIO
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 
 import aiohttp
 import asyncio
 import feedparser
+import lxml.html
+import numpy as np
+import orjson
 from fastmcp import FastMCP
+from lxml import etree
 from pydantic import BaseModel, Field, field_validator, ConfigDict
 
+try:
+    import uvloop
+
+    # Entry points run on uvloop without installing it as the global (deprecated) loop policy
+    _run = uvloop.run
+except ImportError:
+    _run = asyncio.run
+
 # Initialize MCP server
 mcp = FastMCP("cybersecurity_news_mcp")
 
@@ -22,70 +42,295 @@ RSS_FEEDS = {
     "ReversingLabs": "https://www.reversinglabs.com/blog/rss.xml",
 }
 
+# Known source names, for validation and help text
+_VALID_SOURCES = frozenset(RSS_FEEDS)
+_SOURCES_DESC = ", ".join(RSS_FEEDS)
+
+# Worker threads that parse feeds off the event loop
+_PARSE_EXECUTOR = ThreadPoolExecutor(max_workers=len(RSS_FEEDS), thread_name_prefix="feed-parser")
+
+
+# Fallback tag stripper for descriptions lxml cannot parse
+_TAG_RE = re.compile(r"<[^>]+>")
+
+# datetime.fromisoformat accepts a trailing "Z" from Python 3.11 on
+_ISO_ACCEPTS_Z = sys.version_info >= (3, 11)
+
+
+# Shared HTTP session, created lazily and reused across fetches on the loop that created it
+_SESSION: Optional[aiohttp.ClientSession] = None
+_SESSION_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+# Per-feed timeouts: fail fast on connect, allow a slower body read
+_FEED_TIMEOUT = aiohttp.ClientTimeout(total=15, connect=5, sock_read=10)
+
+# Sent with every feed request
+_FEED_HEADERS = {"User-Agent": "cybersecurity-news-feed/1.0"}
+
+# How long a fetched feed is served from memory before it is revalidated
+CACHE_DURATION_MINUTES = int(os.getenv("CACHE_DURATION_MINUTES", "10"))
+
+# Per-feed cache: url -> (monotonic fetch time, items, ETag, Last-Modified)
+_FEED_CACHE: Dict[str, Tuple[float, List[Dict], Optional[str], Optional[str]]] = {}
+
+# In-flight refresh per feed URL, awaited by every request that finds the cache stale
+_FEED_REFRESHES: Dict[str, asyncio.Task] = {}
+
 
 class ResponseFormat(str, Enum):
     MARKDOWN = "markdown"
     JSON = "json"
 
 
+def _strip_html(description: str) -> str:
+    """Strip HTML tags and decode entities from a description."""
+    if "<" not in description:
+        return description
+    try:
+        return lxml.html.fromstring(description).text_content()
+    except etree.LxmlError:
+        return _TAG_RE.sub("", description)
+
+
+def _build_news_item(name: str, title: str, link: str, description: str, pub_date: datetime, author: str) -> Dict:
+    """Build a news item from the fields extracted from a feed entry."""
+    # Clean HTML tags from description
+    description = _strip_html(description).strip()
+    description = description[:300] + "..." if len(description) > 300 else description
+    title = title or "Untitled"
+
+    return {
+        "title": title,
+        "link": link,
+        "description": description,
+        "published": pub_date,
+        "source": name,
+        "author": author or name,
+        # Case-folded title and description, precomputed once for search filtering;
+        # the newline keeps a match from spanning both fields
+        "_search_blob": f"{title}\n{description}".casefold(),
+        # Publication time as UTC epoch seconds, for sorting, vectorized filtering and clients
+        "published_epoch": int(pub_date.replace(tzinfo=timezone.utc).timestamp()),
+    }
+
+
+def _find_text(element, *paths: str) -> str:
+    """Return the first non-empty text found under the given paths."""
+    for path in paths:
+        text = element.findtext(path)
+        if text and text.strip():
+            return text.strip()
+    return ""
+
+
+def _utcnow() -> datetime:
+    """Current time as a naive UTC datetime, matching the parsed publication dates."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _parse_date(value: str) -> datetime:
+    """Parse an RFC 822 (RSS) or ISO 8601 (Atom) date into a naive UTC datetime."""
+    try:
+        pub_date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            pub_date = datetime.fromisoformat(value if _ISO_ACCEPTS_Z else value.replace("Z", "+00:00"))
+        except ValueError:
+            return _utcnow()
+
+    if pub_date.tzinfo is not None:
+        pub_date = pub_date.astimezone(timezone.utc).replace(tzinfo=None)
+    return pub_date
+
+
+def _parse_feed_lxml(content: bytes, source: str) -> List[Dict]:
+    """Parse an RSS/Atom feed with a streaming lxml pass."""
+    news_items = []
+    # Only entities declared inside the document are expanded; nothing is fetched from the network
+    parser_events = etree.iterparse(
+        BytesIO(content), events=("end",), tag=("item", "{*}entry"), resolve_entities="internal", no_network=True
+    )
+    for _, entry in parser_events:
+        # Atom stores the link in the href attribute
+        link = _find_text(entry, "link")
+        if not link:
+            for link_el in entry.iterfind("{*}link"):
+                if link_el.get("rel", "alternate") == "alternate":
+                    link = link_el.get("href", "")
+                    break
+
+        pub_str = _find_text(entry, "pubDate", "{*}published", "{*}updated")
+
+        news_items.append(
+            _build_news_item(
+                source,
+                title=_find_text(entry, "title", "{*}title"),
+                link=link,
+                description=_find_text(entry, "description", "{*}summary"),
+                pub_date=_parse_date(pub_str) if pub_str else _utcnow(),
+                author=_find_text(entry, "author", "{*}author/{*}name", "{*}creator"),
+            )
+        )
+
+        # Release the processed element
+        entry.clear()
+        # Drop earlier siblings too, so memory stays flat on long feeds
+        while entry.getprevious() is not None:
+            del entry.getparent()[0]
+
+    return news_items
+
+
+def _parse_feed_feedparser(content: bytes, source: str) -> List[Dict]:
+    """Parse a feed with feedparser (slower, but tolerant of malformed XML)."""
+    feed = feedparser.parse(content)
+
+    news_items = []
+    for entry in feed.entries:
+        # Extract publication date
+        pub_parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+        pub_date = datetime(*pub_parsed[:6]) if pub_parsed else _utcnow()
+
+        # Extract description
+        description = entry.get("description") or entry.get("summary") or ""
+
+        news_items.append(
+            _build_news_item(
+                source,
+                title=entry.get("title") or "Untitled",
+                link=entry.get("link") or "",
+                description=description,
+                pub_date=pub_date,
+                author=entry.get("author") or source,
+            )
+        )
+
+    return news_items
+
+
+def _parse_feed(content: bytes, source: str) -> List[Dict]:
+    """Parse a feed with lxml, falling back to feedparser on invalid XML or an unknown layout."""
+    try:
+        news_items = _parse_feed_lxml(content, source)
+    except etree.XMLSyntaxError:
+        return _parse_feed_feedparser(content, source)
+
+    # No RSS items or Atom entries found (e.g. RSS 1.0/RDF): let feedparser handle the layout
+    return news_items or _parse_feed_feedparser(content, source)
+
+
 async def _fetch_feed(session: aiohttp.ClientSession, name: str, url: str) -> List[Dict]:
-    """Fetch and parse a single RSS feed."""
+    """Fetch and parse a single RSS feed, serving it from the per-feed cache while fresh."""
+    cached = _FEED_CACHE.get(url)
+    if cached and time.monotonic() - cached[0] < CACHE_DURATION_MINUTES * 60:
+        return cached[1]
+
+    # Concurrent requests join the refresh already running instead of each starting
+    # (and, for a hanging feed, each timing out on) their own
+    refresh = _FEED_REFRESHES.get(url)
+    if refresh is None or refresh.get_loop() is not asyncio.get_running_loop():
+        refresh = asyncio.create_task(_refresh_feed(session, name, url))
+        _FEED_REFRESHES[url] = refresh
+        refresh.add_done_callback(functools.partial(_forget_refresh, url))
+
+    # Shielded so one cancelled request doesn't cancel the refresh for the others
+    return await asyncio.shield(refresh)
+
+
+def _forget_refresh(url: str, task: asyncio.Task) -> None:
+    """Drop a finished refresh so the next stale read starts a new one."""
+    if _FEED_REFRESHES.get(url) is task:
+        del _FEED_REFRESHES[url]
+
+
+async def _refresh_feed(session: aiohttp.ClientSession, name: str, url: str) -> List[Dict]:
+    """Download (or revalidate) a feed and update its cache entry.
+
+    Errors go to stderr: under the stdio transport stdout carries the MCP protocol.
+    """
+    cached = _FEED_CACHE.get(url)
+
+    # Revalidate with the validators from the previous download
+    headers = {}
+    if cached and cached[2]:
+        headers["If-None-Match"] = cached[2]
+    if cached and cached[3]:
+        headers["If-Modified-Since"] = cached[3]
+
     try:
-        async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as response:
-            content = await response.text()
-            feed = feedparser.parse(content)
-
-            news_items = []
-            for entry in feed.entries:
-                # Extract publication date
-                pub_date = None
-                if hasattr(entry, "published_parsed") and entry.published_parsed:
-                    pub_date = datetime(*entry.published_parsed[:6])
-                elif hasattr(entry, "updated_parsed") and entry.updated_parsed:
-                    pub_date = datetime(*entry.updated_parsed[:6])
-                else:
-                    pub_date = datetime.now()
-
-                # Extract description
-                description = ""
-                if hasattr(entry, "description"):
-                    description = entry.description
-                elif hasattr(entry, "summary"):
-                    description = entry.summary
-
-                # Clean HTML tags from description
-                description = re.sub(r"<[^>]+>", "", description).strip()
-
-                news_items.append(
-                    {
-                        "title": entry.title if hasattr(entry, "title") else "Untitled",
-                        "link": entry.link if hasattr(entry, "link") else "",
-                        "description": description[:300] + "..." if len(description) > 300 else description,
-                        "published": pub_date,
-                        "source": name,
-                        "author": entry.author if hasattr(entry, "author") else name,
-                    }
-                )
-
-            return news_items
+        async with session.get(url, headers=headers, timeout=_FEED_TIMEOUT) as response:
+            if response.status == 304 and cached:
+                # Unchanged: keep the parsed items and restart the TTL
+                _FEED_CACHE[url] = (time.monotonic(), *cached[1:])
+                return cached[1]
+
+            if response.status != 200:
+                # Error pages are neither parsed nor cached; keep serving the last good items
+                print(f"Error fetching {name}: HTTP {response.status}", file=sys.stderr)
+                return cached[1] if cached else []
+
+            # Raw bytes: the XML declares its own encoding
+            content = await response.read()
+            loop = asyncio.get_running_loop()
+            news = await loop.run_in_executor(_PARSE_EXECUTOR, _parse_feed, content, name)
+            # Cached newest first so the feeds can be merged without a full sort
+            news.sort(key=itemgetter("published_epoch"), reverse=True)
+            _FEED_CACHE[url] = (
+                time.monotonic(),
+                news,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+            )
+            return news
 
     except Exception as e:
-        print(f"Error fetching {name}: {e}")
-        return []
+        print(f"Error fetching {name}: {e!r}", file=sys.stderr)
+        return cached[1] if cached else []
+
+
+async def _get_session() -> aiohttp.ClientSession:
+    """Return the shared HTTP session, creating it on first use and for each new event loop."""
+    global _SESSION, _SESSION_LOOP
+
+    loop = asyncio.get_running_loop()
+    # A session bound to an earlier (now closed) loop can't be used or closed; replace it
+    if _SESSION is None or _SESSION.closed or _SESSION_LOOP is not loop:
+        connector = aiohttp.TCPConnector(
+            limit=100, limit_per_host=10, keepalive_timeout=60, ttl_dns_cache=600, enable_cleanup_closed=True
+        )
+        _SESSION = aiohttp.ClientSession(connector=connector, headers=_FEED_HEADERS)
+        _SESSION_LOOP = loop
+
+    return _SESSION
 
 
-async def _fetch_all_feeds() -> List[Dict]:
-    """Fetch all RSS feeds concurrently."""
-    async with aiohttp.ClientSession() as session:
-        tasks = [_fetch_feed(session, name, url) for name, url in RSS_FEEDS.items()]
-        results = await asyncio.gather(*tasks)
+async def _close_session() -> None:
+    """Close the shared HTTP session, if one is open."""
+    global _SESSION, _SESSION_LOOP
 
-        # Combine all results
-        all_news = []
-        for news_list in results:
-            all_news.extend(news_list)
+    if _SESSION is not None and not _SESSION.closed and _SESSION_LOOP is asyncio.get_running_loop():
+        await _SESSION.close()
+    _SESSION = None
+    _SESSION_LOOP = None
 
-        return all_news
+
+async def _fetch_all_feeds(session: Optional[aiohttp.ClientSession] = None) -> List[Dict]:
+    """Fetch all RSS feeds concurrently, newest first, using the shared session unless one is given."""
+    if session is None:
+        session = await _get_session()
+    tasks = [asyncio.create_task(_fetch_feed(session, name, url)) for name, url in RSS_FEEDS.items()]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    # Combine all results; a feed that failed must not take down the others
+    per_feed = []
+    for name, news_list in zip(RSS_FEEDS, results):
+        if isinstance(news_list, BaseException):
+            print(f"Error fetching {name}: {news_list!r}", file=sys.stderr)
+            continue
+        per_feed.append(news_list)
+
+    # Each feed is already sorted newest first, so a k-way merge is enough
+    return list(heapq.merge(*per_feed, key=itemgetter("published_epoch"), reverse=True))
 
 
 def _filter_by_time(news_items: List[Dict], hours: Optional[int]) -> List[Dict]:
@@ -93,8 +338,10 @@ def _filter_by_time(news_items: List[Dict], hours: Optional[int]) -> List[Dict]:
     if hours is None:
         return news_items
 
-    cutoff_time = datetime.now() - timedelta(hours=hours)
-    return [item for item in news_items if item["published"] >= cutoff_time]
+    # One vectorized comparison instead of a datetime comparison per item
+    cutoff_epoch = time.time() - hours * 3600
+    published_epoch = np.fromiter(map(itemgetter("published_epoch"), news_items), dtype=np.int64, count=len(news_items))
+    return [news_items[i] for i in np.flatnonzero(published_epoch >= cutoff_epoch).tolist()]
 
 
 def _filter_by_search(news_items: List[Dict], search_term: Optional[str]) -> List[Dict]:
@@ -102,21 +349,26 @@ def _filter_by_search(news_items: List[Dict], search_term: Optional[str]) -> Lis
     if not search_term:
         return news_items
 
-    search_term = search_term.lower()
-    return [item for item in news_items if search_term in item["title"].lower() or search_term in item["description"].lower()]
+    # One plain substring test per item against the case-folded blob: no regex, no per-item lowering
+    search_term = search_term.casefold()
+    return [item for item in news_items if search_term in item["_search_blob"]]
 
 
-def _filter_by_sources(news_items: List[Dict], sources: Optional[List[str]]) -> List[Dict]:
+def _filter_by_sources(news_items: List[Dict], sources: Optional[Iterable[str]]) -> List[Dict]:
     """Filter news by sources."""
     if not sources:
         return news_items
 
-    return [item for item in news_items if item["source"] in sources]
+    # A frozenset argument is reused as-is rather than copied
+    wanted = frozenset(sources)
+    return [item for item in news_items if item["source"] in wanted]
 
 
-def _format_time_ago(published: datetime) -> str:
+def _format_time_ago(published: datetime, now: Optional[datetime] = None) -> str:
     """Convert datetime to human-readable time ago string."""
-    time_diff = datetime.now() - published
+    if now is None:
+        now = _utcnow()
+    time_diff = now - published
     if time_diff.days > 0:
         return f"{time_diff.days} day{'s' if time_diff.days > 1 else ''} ago"
     elif time_diff.seconds >= 3600:
@@ -133,9 +385,11 @@ def _format_markdown(news_items: List[Dict]) -> str:
         return "No news items found matching your criteria."
 
     output = [f"# Cybersecurity News ({len(news_items)} articles)\n"]
+    # One clock read for the whole listing
+    now = _utcnow()
 
     for item in news_items:
-        time_ago = _format_time_ago(item["published"])
+        time_ago = _format_time_ago(item["published"], now)
         output.append(f"## {item['title']}")
         output.append(f"**Source:** {item['source']} | **Published:** {time_ago}")
         output.append(f"**Link:** {item['link']}")
@@ -145,19 +399,26 @@ def _format_markdown(news_items: List[Dict]) -> str:
     return "\n".join(output)
 
 
+def _serialize_item(item: Dict, now: Optional[datetime] = None) -> Dict:
+    """Build the JSON-ready representation of a news item."""
+    # Leave out internal fields such as the case-folded search blob
+    item_copy = {key: value for key, value in item.items() if not key.startswith("_")}
+    if "published" in item_copy and isinstance(item_copy["published"], datetime):
+        item_copy["published"] = item_copy["published"].isoformat()
+        item_copy["time_ago"] = _format_time_ago(item["published"], now)
+    return item_copy
+
+
+def _build_json_dict(news_items: List[Dict]) -> Dict:
+    """Build the JSON-ready response payload for a list of news items."""
+    now = _utcnow()
+    serializable_items = [_serialize_item(item, now) for item in news_items]
+    return {"total_count": len(serializable_items), "news_items": serializable_items}
+
+
 def _format_json(news_items: List[Dict]) -> str:
     """Format news items as JSON."""
-    # Create serializable copy
-    serializable_items = []
-    for item in news_items:
-        item_copy = item.copy()
-        if "published" in item_copy and isinstance(item_copy["published"], datetime):
-            item_copy["published"] = item_copy["published"].isoformat()
-            item_copy["time_ago"] = _format_time_ago(item["published"])
-        serializable_items.append(item_copy)
-
-    result = {"total_count": len(serializable_items), "news_items": serializable_items}
-    return json.dumps(result, indent=2, ensure_ascii=False)
+    return orjson.dumps(_build_json_dict(news_items), option=orjson.OPT_INDENT_2).decode()
 
 
 # =============================================================================
@@ -166,13 +427,13 @@ def _format_json(news_items: List[Dict]) -> str:
 class GetNewsInput(BaseModel):
     """Input parameters for getting cybersecurity news."""
 
-    model_config = ConfigDict(str_strip_whitespace=True, validate_assignment=True, extra="forbid")
+    model_config = ConfigDict(str_strip_whitespace=True, validate_assignment=False, extra="forbid")
 
     hours: int | None = Field(
         default=24, description="Filter news from the last N hours (e.g., 12, 24, 48). Default: 24 hours", ge=1, le=720
     )
     sources: List[str] | None = Field(
-        default=None, description=f"Filter by specific sources. Available: {', '.join(RSS_FEEDS.keys())}", max_length=len(RSS_FEEDS)
+        default=None, description=f"Filter by specific sources. Available: {_SOURCES_DESC}", max_length=len(RSS_FEEDS)
     )
     search: str | None = Field(default=None, description="Search term to filter news by title or description", max_length=200)
     response_format: ResponseFormat = Field(default=ResponseFormat.MARKDOWN, description="Output format: 'markdown' or 'json'")
@@ -182,9 +443,9 @@ class GetNewsInput(BaseModel):
     def validate_sources(cls, v: Optional[List[str]]) -> Optional[List[str]]:
         """Validate that all sources are known."""
         if v is not None:
-            invalid_sources = [s for s in v if s not in RSS_FEEDS]
+            invalid_sources = [s for s in v if s not in _VALID_SOURCES]
             if invalid_sources:
-                raise ValueError(f"Invalid sources: {', '.join(invalid_sources)}. " f"Available: {', '.join(RSS_FEEDS.keys())}")
+                raise ValueError(f"Invalid sources: {', '.join(invalid_sources)}. " f"Available: {_SOURCES_DESC}")
         return v
 
 
@@ -217,14 +478,11 @@ async def get_news(params: GetNewsInput) -> str:
         # Fetch news from all feeds
         news_items = await _fetch_all_feeds()
 
-        # Apply filters
+        # Apply filters; they keep the newest-first order from _fetch_all_feeds
         filtered_news = _filter_by_time(news_items, params.hours)
         filtered_news = _filter_by_search(filtered_news, params.search)
         filtered_news = _filter_by_sources(filtered_news, params.sources)
 
-        # Sort by publication date (newest first)
-        filtered_news = sorted(filtered_news, key=lambda x: x["published"], reverse=True)
-
         # Format output
         if params.response_format == ResponseFormat.MARKDOWN:
             return _format_markdown(filtered_news)
@@ -238,7 +496,7 @@ async def get_news(params: GetNewsInput) -> str:
 class ListSourcesInput(BaseModel):
     """Input parameters for listing available news sources."""
 
-    model_config = ConfigDict(str_strip_whitespace=True, validate_assignment=True, extra="forbid")
+    model_config = ConfigDict(str_strip_whitespace=True, validate_assignment=False, extra="forbid")
 
     response_format: ResponseFormat = Field(default=ResponseFormat.MARKDOWN, description="Output format: 'markdown' or 'json'")
 
@@ -273,14 +531,12 @@ async def list_sources(params: ListSourcesInput) -> str:
             return "\n".join(output)
         else:
             result = {"total_sources": len(RSS_FEEDS), "sources": [{"name": name, "feed_url": url} for name, url in RSS_FEEDS.items()]}
-            return json.dumps(result, indent=2)
+            return orjson.dumps(result, option=orjson.OPT_INDENT_2).decode()
 
     except Exception as e:
         return f"Error: Failed to list sources: {type(e).__name__}: {str(e)}"
 
 
 if __name__ == "__main__":
-#    mcp.run(transport="sse")
-    mcp.run(transport="stdio")
-    
-
+#    _run(mcp.run_async(transport="sse"))
+    _run(mcp.run_async(transport="stdio"))
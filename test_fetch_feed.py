@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Offline checks for feed fetching and the per-feed cache.
+Serves feeds from a local HTTP server to cover the 200, 304, error and timeout paths of _fetch_feed.
+"""
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+import aiohttp
+
+import mcp_server
+from mcp_server import _FEED_CACHE, _fetch_feed
+
+RSS_FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel>
+<item><title>Older</title><link>https://example.com/1</link><pubDate>Tue, 13 Oct 2026 08:00:00 GMT</pubDate></item>
+<item><title>Newer</title><link>https://example.com/2</link><pubDate>Wed, 14 Oct 2026 08:00:00 GMT</pubDate></item>
+</channel></rss>"""
+
+ETAG = '"v1"'
+
+# Requests seen by the server, per path
+HITS: Dict[str, int] = {}
+
+
+class _FeedHandler(BaseHTTPRequestHandler):
+    """/ok serves the feed (304 when revalidated), /error answers 503, /hang never answers in time."""
+
+    def do_GET(self):
+        HITS[self.path] = HITS.get(self.path, 0) + 1
+        if self.path == "/hang":
+            time.sleep(3)
+            return
+        if self.path == "/error":
+            self.send_response(503)
+            self.end_headers()
+            self.wfile.write(b"<html>Service Unavailable</html>")
+            return
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(RSS_FEED)))
+        self.end_headers()
+        self.wfile.write(RSS_FEED)
+
+    def log_message(self, *args):
+        pass
+
+
+_BASE_URL = None
+
+
+def _base_url() -> str:
+    """Start the local feed server on first use and return its URL."""
+    global _BASE_URL
+
+    if _BASE_URL is None:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _FeedHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        _BASE_URL = f"http://127.0.0.1:{server.server_port}"
+    return _BASE_URL
+
+
+def _fetch(path: str, concurrent: int = 1) -> List[List[Dict]]:
+    """Run _fetch_feed for one path, optionally from several concurrent requests."""
+
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            url = _base_url() + path
+            return await asyncio.gather(*(_fetch_feed(session, "Local", url) for _ in range(concurrent)))
+
+    return asyncio.run(run())
+
+
+def _expire(path: str):
+    """Age a cache entry past the TTL without touching its items or validators."""
+    url = _base_url() + path
+    fetched_at, *rest = _FEED_CACHE[url]
+    _FEED_CACHE[url] = (fetched_at - mcp_server.CACHE_DURATION_MINUTES * 60 - 1, *rest)
+
+
+def test_ok_is_parsed_and_cached():
+    """200: the feed is parsed newest first and served from the cache while fresh."""
+    HITS.clear()
+    _FEED_CACHE.clear()
+    (news,) = _fetch("/ok")
+    assert [item["title"] for item in news] == ["Newer", "Older"]
+    (news,) = _fetch("/ok")
+    assert len(news) == 2
+    assert HITS["/ok"] == 1
+
+
+def test_not_modified_restarts_ttl():
+    """304: the cached items are kept and the TTL starts over."""
+    HITS.clear()
+    _FEED_CACHE.clear()
+    _fetch("/ok")
+    _expire("/ok")
+    (news,) = _fetch("/ok")
+    assert [item["title"] for item in news] == ["Newer", "Older"]
+    assert HITS["/ok"] == 2
+    # Fresh again, so no third request
+    _fetch("/ok")
+    assert HITS["/ok"] == 2
+
+
+def test_error_is_not_cached():
+    """5xx: nothing is parsed or cached, and the last good items are served while it lasts."""
+    HITS.clear()
+    _FEED_CACHE.clear()
+    assert _fetch("/error") == [[]]
+    assert _base_url() + "/error" not in _FEED_CACHE
+
+    # A feed that goes down after a good fetch keeps serving its items and retries next time
+    url = _base_url() + "/error"
+    stale = time.monotonic() - mcp_server.CACHE_DURATION_MINUTES * 60 - 1
+    _FEED_CACHE[url] = (stale, [{"title": "Stale"}], None, None)
+    assert _fetch("/error") == [[{"title": "Stale"}]]
+    assert _FEED_CACHE[url][0] == stale
+    assert HITS["/error"] == 2
+
+
+def test_timeout_is_shared():
+    """Timeout: concurrent requests share one attempt instead of timing out one after another."""
+    HITS.clear()
+    _FEED_CACHE.clear()
+    default_timeout = mcp_server._FEED_TIMEOUT
+    mcp_server._FEED_TIMEOUT = aiohttp.ClientTimeout(total=1)
+    try:
+        started = time.monotonic()
+        results = _fetch("/hang", concurrent=4)
+        elapsed = time.monotonic() - started
+    finally:
+        mcp_server._FEED_TIMEOUT = default_timeout
+    assert results == [[], [], [], []]
+    assert HITS["/hang"] == 1
+    assert elapsed < 2, elapsed
+
+
+def main():
+    """Run all checks."""
+    print("\n🧪 Testing feed fetching offline\n")
+
+    checks = (
+        test_ok_is_parsed_and_cached,
+        test_not_modified_restarts_ttl,
+        test_error_is_not_cached,
+        test_timeout_is_shared,
+    )
+    for check in checks:
+        check()
+        print(f"✅ {check.__doc__.splitlines()[0]}")
+
+    print("=" * 80)
+    print("✅ All fetch checks passed!")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
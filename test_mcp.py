@@ -3,12 +3,14 @@
 Simple test script for the MCP server.
 Run this to test the server functions directly.
 """
-import asyncio
 import sys
+from typing import Dict, List
 sys.path.insert(0, '/home/jorge/Desktop/jalvarez/cybersecurity-news-feed')
 
 from mcp_server import (
+    _close_session,
     _fetch_all_feeds,
+    _run,
     _filter_by_time,
     _filter_by_search,
     _filter_by_sources,
@@ -19,7 +21,7 @@ from mcp_server import (
 )
 
 
-async def test_list_sources():
+async def check_list_sources():
     """Test listing all sources."""
     print("=" * 80)
     print("TEST 1: List all sources")
@@ -34,13 +36,12 @@ async def test_list_sources():
     print()
 
 
-async def test_get_all_news():
+async def check_get_all_news(news_items: List[Dict]):
     """Test getting all news from last 24 hours."""
     print("=" * 80)
     print("TEST 2: Get all news (last 24 hours)")
     print("=" * 80)
     
-    news_items = await _fetch_all_feeds()
     filtered_news = _filter_by_time(news_items, 24)
     filtered_news = sorted(filtered_news, key=lambda x: x["published"], reverse=True)
     result = _format_markdown(filtered_news[:5])  # Show first 5 only
@@ -48,13 +49,12 @@ async def test_get_all_news():
     print()
 
 
-async def test_search_news():
+async def check_search_news(news_items: List[Dict]):
     """Test searching for specific topics."""
     print("=" * 80)
     print("TEST 3: Search for 'malware' news")
     print("=" * 80)
     
-    news_items = await _fetch_all_feeds()
     filtered_news = _filter_by_time(news_items, 48)
     filtered_news = _filter_by_search(filtered_news, "malware")
     filtered_news = sorted(filtered_news, key=lambda x: x["published"], reverse=True)
@@ -63,28 +63,26 @@ async def test_search_news():
     print()
 
 
-async def test_filter_by_source():
+async def check_filter_by_source(news_items: List[Dict]):
     """Test filtering by specific source."""
     print("=" * 80)
     print("TEST 4: Get news from BleepingComputer only")
     print("=" * 80)
     
-    news_items = await _fetch_all_feeds()
     filtered_news = _filter_by_time(news_items, 24)
-    filtered_news = _filter_by_sources(filtered_news, ["BleepingComputer"])
+    filtered_news = _filter_by_sources(filtered_news, frozenset({"BleepingComputer"}))
     filtered_news = sorted(filtered_news, key=lambda x: x["published"], reverse=True)
     result = _format_markdown(filtered_news[:5])  # Show first 5 only
     print(result)
     print()
 
 
-async def test_json_format():
+async def check_json_format(news_items: List[Dict]):
     """Test JSON output format."""
     print("=" * 80)
     print("TEST 5: Get news in JSON format")
     print("=" * 80)
     
-    news_items = await _fetch_all_feeds()
     filtered_news = _filter_by_time(news_items, 12)
     filtered_news = sorted(filtered_news, key=lambda x: x["published"], reverse=True)
     result = _format_json(filtered_news[:3])  # Show first 3 only
@@ -96,18 +94,23 @@ async def main():
     """Run all tests."""
     print("\n🚀 Testing Cybersecurity News MCP Server\n")
     
+    # Fetch the feeds once; every test filters the same items
+    news_items = await _fetch_all_feeds()
+    
     # Run tests
-    await test_list_sources()
-    await test_get_all_news()
-    await test_search_news()
-    await test_filter_by_source()
-    await test_json_format()
+    await check_list_sources()
+    await check_get_all_news(news_items)
+    await check_search_news(news_items)
+    await check_filter_by_source(news_items)
+    await check_json_format(news_items)
     
     print("=" * 80)
     print("✅ All tests completed!")
     print("=" * 80)
+    
+    await _close_session()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    _run(main())
 